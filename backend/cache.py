@@ -1,12 +1,21 @@
 # cache.py
 # Redis connection and caching utilities
 
+import logging
 import redis
+import redis.asyncio as aioredis
+import asyncio
 import os
+import time
+from cachetools import TTLCache
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# debug() calls are skipped entirely unless LOG_LEVEL=DEBUG
+# (%-style args are only formatted if the line is logged)
+logger = logging.getLogger(__name__)
+
 # ============================================
 # REDIS CONNECTION
 # ============================================
@@ -16,31 +25,91 @@ REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "")
 
+# Optional Unix socket path (when Redis runs on the same host)
+# Skips the TCP stack entirely - faster than localhost TCP
+# Leave unset to connect over TCP with REDIS_HOST/REDIS_PORT
+REDIS_SOCKET = os.getenv("REDIS_SOCKET", "")
+
 # How long to keep URLs in cache (seconds)
 # 3600 = 1 hour
 CACHE_TTL = int(os.getenv("CACHE_TTL", "3600"))
 
-# Create Redis client
-# decode_responses=True means Redis returns
-# strings instead of bytes
-redis_client = redis.Redis(
-    host=REDIS_HOST,
-    port=REDIS_PORT,
-    password=REDIS_PASSWORD,
-    decode_responses=True  # Return strings not bytes!
-)
+# How long to remember that a short code DOESN'T exist
+# Short, so a newly created slug isn't hidden for long
+NEGATIVE_TTL = int(os.getenv("NEGATIVE_TTL", "60"))
+
+# In-process (L1) cache in front of Redis
+# Hot short codes are answered from a dict - no network.
+# Each worker has its own copy, so keep the TTL short:
+# another worker's invalidate_url() only reaches Redis,
+# and this copy may serve the old URL until it expires.
+LOCAL_CACHE_SIZE = int(os.getenv("LOCAL_CACHE_SIZE", "10000"))
+LOCAL_CACHE_TTL = int(os.getenv("LOCAL_CACHE_TTL", "60"))
+
+# Only touched from the event loop thread (all callers
+# are coroutines), so no lock is needed
+local_cache = TTLCache(maxsize=LOCAL_CACHE_SIZE, ttl=LOCAL_CACHE_TTL)
+
+# Results of a cache lookup
+CACHE_HIT = "hit"        # URL found in cache
+CACHE_NEGATIVE = "neg"   # Known NOT to exist
+CACHE_MISS = "miss"      # Unknown - ask the database
+
+# Connection pool size (per worker process)
+# When every connection is busy, a request WAITS up to
+# REDIS_POOL_TIMEOUT seconds for one to free up, instead
+# of failing straight away with "Too many connections"
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "64"))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+
+
+def _make_pool(max_connections: int):
+    """Build a blocking pool for the Unix socket or TCP"""
+    if REDIS_SOCKET:
+        return aioredis.BlockingConnectionPool(
+            connection_class=aioredis.UnixDomainSocketConnection,
+            path=REDIS_SOCKET,
+            password=REDIS_PASSWORD,
+            decode_responses=False,
+            max_connections=max_connections,
+            timeout=REDIS_POOL_TIMEOUT
+        )
+    return aioredis.BlockingConnectionPool(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        password=REDIS_PASSWORD,
+        decode_responses=False,
+        max_connections=max_connections,
+        timeout=REDIS_POOL_TIMEOUT
+    )
+
+
+# Create async Redis client
+# The asyncio client yields to the event loop while
+# waiting on the socket, so one worker can serve many
+# redirects at once. It keeps its own connection pool.
+# decode_responses=False means Redis returns raw bytes -
+# we only decode the URL when we actually redirect.
+# (If hiredis is installed, redis-py uses its fast C parser.)
+redis_client = aioredis.Redis(connection_pool=_make_pool(REDIS_MAX_CONNECTIONS))
+
+# Separate client for the click writer (see CLICK QUEUE)
+# Its XREADGROUP holds a connection for up to
+# CLICK_BLOCK_MS - on its own pool that never takes a
+# connection away from redirects.
+stream_client = aioredis.Redis(connection_pool=_make_pool(2))
 
 # ============================================
 # TEST CONNECTION
 # ============================================
 
-def test_connection() -> bool:
+async def test_connection() -> bool:
     """
     Test if Redis is reachable.
     Returns True if connected, False if not.
     """
     try:
-        redis_client.ping()
+        await redis_client.ping()
         return True
     except redis.ConnectionError:
         return False
@@ -49,71 +118,290 @@ def test_connection() -> bool:
 # CACHE OPERATIONS
 # ============================================
 
-def cache_url(short_code: str, original_url: str) -> None:
+async def cache_url(short_code: str, original_url: str, expires_at=None) -> None:
     """
     Store a URL in Redis cache.
 
     Key format: "url:{short_code}"
     Example:    "url:google" → "https://google.com"
 
+    Links with an expiry go under "urlx:{short_code}"
+    instead, and never outlive their expires_at.
+
     Args:
         short_code:   The short code (e.g., "google")
         original_url: The original URL to cache
+        expires_at:   When the link stops working (None = never)
     """
-    key = f"url:{short_code}"
+    if expires_at is None:
+        key = f"url:{short_code}"
+        ttl = CACHE_TTL
+    else:
+        # Cap the TTL at the time left, so the link starts
+        # returning 410 on time instead of a cached 307.
+        # (get_cached_url doesn't slide "urlx:" keys.)
+        key = f"urlx:{short_code}"
+        ttl = min(CACHE_TTL, int(expires_at.timestamp() - time.time()))
+        if ttl <= 0:
+            return
 
     # setex = SET with EXpiry
-    # After CACHE_TTL seconds, Redis deletes this automatically!
-    redis_client.setex(
+    # After ttl seconds, Redis deletes this automatically!
+    await redis_client.setex(
         name=key,           # The key
-        time=CACHE_TTL,     # Expiry in seconds
+        time=ttl,           # Expiry in seconds
         value=original_url  # The value
     )
-    print(f"Cached: {key} → {original_url} (TTL: {CACHE_TTL}s)")
+
+    # The local cache has one fixed TTL for every entry,
+    # which could outlast an expiring link - skip those
+    if expires_at is None:
+        local_cache[key] = original_url.encode()
+    logger.debug("Cached: %s → %s (TTL: %ss)", key, original_url, ttl)
 
 
-def get_cached_url(short_code: str):
+async def get_cached_url(short_code: str) -> tuple:
     """
-    Get a URL from Redis cache.
+    Get a URL from the local cache, then Redis.
 
     Returns:
-        The original URL string if found
-        None if not in cache (cache miss)
+        (CACHE_HIT, url)       if found (url as bytes)
+        (CACHE_NEGATIVE, None) if known not to exist
+        (CACHE_MISS, None)     if not in cache
     """
     key = f"url:{short_code}"
-    cached = redis_client.get(key)
+
+    # L1: in-process dict lookup (no I/O at all)
+    cached = local_cache.get(key)
+    if cached is not None:
+        logger.debug("Cache %s: %s", "LOCAL HIT", key)
+        return CACHE_HIT, cached
+
+    expiring_key = f"urlx:{short_code}"
+    neg_key = f"miss:{short_code}"
+
+    # L2: all lookups + the TTL refresh in one round-trip
+    # Refreshing the TTL on every read keeps hot
+    # codes cached (LRU-like), and costs nothing extra.
+    # Expiring links and negative entries live under their
+    # own keys, so the EXPIRE here never pushes them past
+    # their deadline / short TTL.
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.get(key)
+        pipe.expire(key, CACHE_TTL)
+        pipe.get(expiring_key)
+        pipe.exists(neg_key)
+        cached, _, cached_expiring, negative = await pipe.execute()
 
     if cached:
-        print(f"Cache HIT: {key}")
-        
-    else:
-        print(f"Cache MISS: {key}")
+        logger.debug("Cache %s: %s", "HIT", key)
+        local_cache[key] = cached
+        return CACHE_HIT, cached
+
+    if cached_expiring:
+        logger.debug("Cache %s: %s", "HIT", expiring_key)
+        return CACHE_HIT, cached_expiring
+
+    if negative:
+        logger.debug("Cache %s: %s", "NEGATIVE", key)
+        return CACHE_NEGATIVE, None
+
+    logger.debug("Cache %s: %s", "MISS", key)
+    return CACHE_MISS, None
 
-    return cached
+
+async def cache_miss(short_code: str) -> None:
+    """
+    Remember that a short code does NOT exist.
+
+    Bots and scanners hit random paths over and over -
+    this lets repeats be answered from Redis instead
+    of the database. Expires after NEGATIVE_TTL seconds.
+    """
+    neg_key = f"miss:{short_code}"
+    await redis_client.setex(name=neg_key, time=NEGATIVE_TTL, value=1)
 
 
-def invalidate_url(short_code: str) -> None:
+async def invalidate_url(short_code: str) -> None:
     """
     Remove a URL from cache.
 
-    Used when URL is deleted or deactivated.
+    Used when URL is created, deleted or deactivated.
     We don't want old data served from cache!
     """
     key = f"url:{short_code}"
-    redis_client.delete(key)
-    print(f"Cache invalidated: {key}")
+    local_cache.pop(key, None)
+    await redis_client.delete(key, f"urlx:{short_code}", f"miss:{short_code}")
+    logger.debug("Cache invalidated: %s", key)
+
+
+# ============================================
+# CLICK QUEUE (Redis Stream)
+# ============================================
+
+# Cached redirects don't write clicks to Postgres
+# themselves - they append an event here and return.
+# The click writer (see main.py) drains it in batches.
+CLICK_STREAM = "clicks_stream"
+CLICK_GROUP = "click-writers"
+
+# Keep at most ~100k unprocessed events
+# (approximate trimming is much cheaper for Redis)
+CLICK_STREAM_MAXLEN = int(os.getenv("CLICK_STREAM_MAXLEN", "100000"))
+
+# At most this many XADDs at once (per worker)
+# Click tasks share redis_client's pool with the cache
+# lookups - the cap keeps a burst of clicks from taking
+# every connection. Extra clicks wait their turn here
+# (no connection held) instead of failing.
+CLICK_ENQUEUE_CONCURRENCY = int(os.getenv("CLICK_ENQUEUE_CONCURRENCY", "16"))
+_enqueue_slots = asyncio.Semaphore(CLICK_ENQUEUE_CONCURRENCY)
+
+
+async def enqueue_click(short_code: str, user_agent, referer) -> None:
+    """
+    Append a click event to the stream.
+
+    Meant to be fired and forgotten, so errors are logged
+    here instead of raised (nobody is awaiting the result).
+    """
+    try:
+        async with _enqueue_slots:
+            await redis_client.xadd(
+                CLICK_STREAM,
+                {"c": short_code, "a": user_agent or "", "r": referer or ""},
+                maxlen=CLICK_STREAM_MAXLEN,
+                approximate=True
+            )
+    except redis.RedisError as e:
+        logger.warning("Could not queue click for %s: %s", short_code, e)
+
+
+async def ensure_click_group() -> None:
+    """Create the stream + consumer group if they don't exist yet"""
+    try:
+        await stream_client.xgroup_create(
+            CLICK_STREAM, CLICK_GROUP, id="0", mkstream=True
+        )
+    except redis.ResponseError as e:
+        # BUSYGROUP = another worker already created it
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def claim_stale_clicks(consumer: str, min_idle_ms: int) -> int:
+    """
+    Take over click events other consumers read but never acked.
+
+    Consumer names change with every deploy (hostname + pid),
+    so a replaced or crashed worker leaves its pending events
+    behind forever. XAUTOCLAIM moves the ones idle for at
+    least min_idle_ms into OUR pending list, where
+    read_clicks(consumer, "0", ...) picks them up.
+
+    Returns:
+        How many events were claimed
+    """
+    claimed, start_id = 0, "0-0"
+    while True:
+        # [next_start_id, [(id, fields), ...], ...]
+        response = await stream_client.xautoclaim(
+            CLICK_STREAM, CLICK_GROUP, consumer,
+            min_idle_time=min_idle_ms, start_id=start_id, count=100
+        )
+        start_id, entries = response[0], response[1]
+        claimed += len(entries)
+
+        # "0-0" = scanned the whole pending list
+        if start_id == b"0-0":
+            return claimed
+
+
+async def read_clicks(consumer: str, last_id: str, count: int, block_ms: int) -> list:
+    """
+    Read a batch of click events for this consumer.
+
+    last_id=">" reads new events (waiting up to block_ms),
+    last_id="0" re-reads ones we read but never acked.
+
+    Returns:
+        List of (event_id, short_code, user_agent, referer)
+        short_code is None if the event was trimmed away
+        before we could re-read it (just ack those)
+    """
+    response = await stream_client.xreadgroup(
+        CLICK_GROUP, consumer, {CLICK_STREAM: last_id},
+        count=count, block=block_ms
+    )
+    if not response:
+        return []
+
+    # [[stream, [(id, {field: value}), ...]]]
+    _, entries = response[0]
+    events = []
+    for event_id, fields in entries:
+        if not fields:
+            events.append((event_id, None, None, None))
+            continue
+        events.append((
+            event_id,
+            fields[b"c"].decode(),
+            fields[b"a"].decode() or None,
+            fields[b"r"].decode() or None
+        ))
+    return events
+
+
+async def ack_clicks(event_ids: list) -> None:
+    """Mark click events as saved (and drop them from the stream)"""
+    async with stream_client.pipeline(transaction=False) as pipe:
+        pipe.xack(CLICK_STREAM, CLICK_GROUP, *event_ids)
+        pipe.xdel(CLICK_STREAM, *event_ids)
+        await pipe.execute()
+
+
+async def check_memory_policy() -> None:
+    """
+    Warn if Redis has no memory limit, or may evict the click queue.
+
+    Without maxmemory, Redis grows until the container is
+    OOM-killed. An allkeys-* policy can evict CLICK_STREAM
+    (it has no TTL) and lose clicks. See redis/redis.conf
+    for the settings we use.
+    """
+    try:
+        info = await redis_client.info("memory")
+    except redis.RedisError as e:
+        logger.warning("Could not read Redis memory settings: %s", e)
+        return
+
+    policy = info.get("maxmemory_policy")
+
+    if not int(info.get("maxmemory", 0)):
+        logger.warning(
+            "Redis has no maxmemory limit (policy: %s) - "
+            "set maxmemory and volatile-lfu, see redis/redis.conf",
+            policy
+        )
+    elif str(policy).startswith("allkeys"):
+        logger.warning(
+            "Redis policy %s can evict the click queue - "
+            "use volatile-lfu, see redis/redis.conf",
+            policy
+        )
 
 
-def get_cache_stats() -> dict:
+async def get_cache_stats() -> dict:
     """
     Get Redis cache statistics.
     Useful for monitoring!
     """
-    info = redis_client.info()
+    info = await redis_client.info()
     return {
         "used_memory": info.get("used_memory_human"),
         "connected_clients": info.get("connected_clients"),
-        "total_keys": redis_client.dbsize(),
+        "local_keys": len(local_cache),
+        "total_keys": await redis_client.dbsize(),
         "hits": info.get("keyspace_hits", 0),
         "misses": info.get("keyspace_misses", 0)
     }
\ No newline at end of file
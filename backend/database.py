@@ -30,15 +30,28 @@ DATABASE_URL = (
     f"@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 )
 
-print(f"Connecting to: postgresql://{POSTGRES_USER}:****"
-      f"@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}")
-
 # ============================================
 # ENGINE
 # ============================================
+# Pool sizing (per worker process)
+# pool_size    = connections kept open
+# max_overflow = extra connections allowed under bursts
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "40"))
+
 engine = create_engine(
     DATABASE_URL,
-    echo=True  # Log all SQL - great for learning!
+    # Log all SQL only when asked (SQL_ECHO=1)
+    # Great for learning, far too slow for production!
+    echo=os.getenv("SQL_ECHO") == "1",
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    # Check a connection is alive before using it
+    # (no errors after the database restarts)
+    pool_pre_ping=True,
+    # Replace connections after 30 min so Postgres
+    # never drops them from under us
+    pool_recycle=1800
 )
 
 # ============================================
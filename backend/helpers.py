@@ -1,9 +1,10 @@
 # helpers.py
 # Reusable helper functions
 
+import re
 import string
 import random
-from datetime import datetime, timezone
+import time
 
 # ============================================
 # SHORT CODE GENERATOR
@@ -28,7 +29,73 @@ def generate_short_code(length: int = 6) -> str:
     Returns:
         Random string of letters and numbers
     """
-    return ''.join(random.choice(CHARACTERS) for _ in range(length))
+    # random.choices picks all k characters in one C call
+    return ''.join(random.choices(CHARACTERS, k=length))
+
+
+def generate_short_codes(count: int, length: int = 6) -> list[str]:
+    """
+    Generate several random short codes at once.
+
+    Used to check a batch of candidates against the
+    database in a single query.
+
+    Example:
+        generate_short_codes(3) → ["aB3xY9", "k4sC01", "Zz9Qe2"]
+
+    Args:
+        count:  How many codes to generate
+        length: How many characters each (default 6)
+
+    Returns:
+        List of random strings of letters and numbers
+    """
+    chars = ''.join(random.choices(CHARACTERS, k=length * count))
+    return [chars[i:i + length] for i in range(0, len(chars), length)]
+
+
+# ============================================
+# SHORT CODE VALIDATOR
+# ============================================
+
+# 3-10 ASCII letters/digits - the shape of every NEW code
+# we hand out (random or custom). Compiled once, and
+# matched in C instead of several Python-level checks.
+SHORT_CODE_PATTERN = re.compile(r"[A-Za-z0-9]{3,10}")
+
+
+def is_valid_short_code(code: str) -> bool:
+    """
+    Check if a string could be a short code.
+
+    Example:
+        is_valid_short_code("aB3xY9")      → True
+        is_valid_short_code("favicon.ico") → False
+
+    Args:
+        code: The string to check
+
+    Returns:
+        True if it has the right shape, False if not
+    """
+    return SHORT_CODE_PATTERN.fullmatch(code) is not None
+
+
+def could_be_stored_code(code: str) -> bool:
+    """
+    Check if a short code could exist in the database.
+
+    Looser than is_valid_short_code: custom slugs used to
+    be checked with str.isalnum(), which also accepts
+    non-ASCII letters ("ñandú"), so older rows may have
+    them. Used to reject impossible paths before any I/O
+    without breaking those links.
+
+    Example:
+        could_be_stored_code("ñandú")       → True
+        could_be_stored_code("favicon.ico") → False
+    """
+    return 3 <= len(code) <= 10 and code.isalnum()
 
 
 # ============================================
@@ -56,14 +123,12 @@ def is_expired(expires_at) -> bool:
     """
     Check if a URL has expired.
     
-    Must use timezone-aware datetime for comparison
-    because PostgreSQL stores timestamps WITH timezone!
+    Compares epoch seconds: time.time() is a plain float,
+    so we don't build a new timezone-aware datetime for
+    "now" on every call. expires_at comes from PostgreSQL
+    WITH timezone, so .timestamp() is exact.
     """
     if expires_at is None:
         return False
-    
-    # datetime.now(timezone.utc) = timezone-AWARE current time
-    # Both sides are now "aware" - comparison works!
-    now = datetime.now(timezone.utc)
-    
-    return expires_at < now
\ No newline at end of file
+
+    return expires_at.timestamp() < time.time()
@@ -5,20 +5,44 @@
 # ============================================
 
 from fastapi import FastAPI, HTTPException, Depends, Request, APIRouter
-from fastapi.responses import RedirectResponse
+from fastapi.responses import ORJSONResponse, PlainTextResponse, RedirectResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import (Integer, String, bindparam, column, func, insert,
+                        or_, select, text, update, values)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
-from cache import (cache_url, get_cached_url,get_cache_stats,test_connection)
+from cache import (cache_url, get_cached_url, cache_miss, invalidate_url,
+                   get_cache_stats, check_memory_policy, test_connection,
+                   enqueue_click, ensure_click_group, claim_stale_clicks,
+                   read_clicks, ack_clicks,
+                   CACHE_HIT, CACHE_NEGATIVE)
 from prometheus_client import Counter, Histogram, Gauge, Info
 from prometheus_fastapi_instrumentator import Instrumentator
+import asyncio
+import collections
+import logging
 import os
+import redis
+import socket
+import time
+from contextlib import asynccontextmanager
 
 # Our own modules
-from database import engine, Base, get_db
+from database import engine, Base, get_db, SessionLocal
 from models import URL, Click
 from schemas import URLCreate, URLResponse, StatsResponse
-from helpers import generate_short_code, is_expired
+from helpers import could_be_stored_code, generate_short_codes, is_expired
+
+# ============================================
+# LOGGING
+# ============================================
+
+# INFO in production; set LOG_LEVEL=DEBUG to see
+# per-request cache HIT/MISS lines
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
 
 # ============================================
 # CREATE TABLES
@@ -36,10 +60,11 @@ urls_created_total = Counter(
     ['is_custom']
 )
 
+# No short_code label - one time series per code
+# would grow without limit (unbounded cardinality)
 redirects_total = Counter(
     'urlshortener_redirects_total',
-    'Total number of redirects',
-    ['short_code']
+    'Total number of redirects'
 )
 
 cache_operations = Counter(
@@ -48,6 +73,14 @@ cache_operations = Counter(
     ['operation', 'result']
 )
 
+# Pre-labeled children for the hot paths
+# .labels() does a lookup on every call - resolve once
+CACHE_GET_HIT = cache_operations.labels(operation='get', result='hit')
+CACHE_GET_MISS = cache_operations.labels(operation='get', result='miss')
+CACHE_GET_NEGATIVE = cache_operations.labels(operation='get', result='negative')
+URLS_CREATED_CUSTOM = urls_created_total.labels(is_custom='True')
+URLS_CREATED_RANDOM = urls_created_total.labels(is_custom='False')
+
 # Gauges (can go up or down)
 active_urls_gauge = Gauge(
     'urlshortener_active_urls',
@@ -74,6 +107,191 @@ app_info.info({
     'environment': 'production'
 })
 
+# ============================================
+# BACKGROUND JOBS
+# ============================================
+
+# How often to recount active URLs (seconds)
+# The gauge is only scraped every few seconds anyway,
+# so it doesn't need a COUNT(*) on every create
+GAUGE_REFRESH_SECONDS = int(os.getenv("GAUGE_REFRESH_SECONDS", "15"))
+
+
+def refresh_active_urls_gauge() -> None:
+    """Recount active URLs for the gauge (runs in threadpool)"""
+    db = SessionLocal()
+    try:
+        active_count = db.query(URL).filter(URL.is_active).count()
+        active_urls_gauge.set(active_count)
+    finally:
+        db.close()
+
+
+async def refresh_gauges_forever() -> None:
+    """Keep the active URLs gauge in sync with the database"""
+    while True:
+        try:
+            await run_in_threadpool(refresh_active_urls_gauge)
+        except Exception as e:
+            logger.warning("Active URLs gauge refresh failed: %s", e)
+        await asyncio.sleep(GAUGE_REFRESH_SECONDS)
+
+
+# Click writer settings
+# Up to CLICK_BATCH_SIZE events become ONE multi-row
+# INSERT + ONE UPDATE, instead of a commit per click
+CLICK_BATCH_SIZE = int(os.getenv("CLICK_BATCH_SIZE", "500"))
+CLICK_BLOCK_MS = int(os.getenv("CLICK_BLOCK_MS", "1000"))
+
+# Unique per worker process - Redis hands each event
+# in the stream to exactly one consumer in the group
+CLICK_CONSUMER = f"{socket.gethostname()}-{os.getpid()}"
+
+# Un-acked events idle this long (ms) belong to a consumer
+# that's gone (old deploy, crash) - we claim them.
+# A live writer re-reads its own within ~1s, so this is
+# far above anything a working consumer leaves idle.
+CLICK_CLAIM_IDLE_MS = int(os.getenv("CLICK_CLAIM_IDLE_MS", "60000"))
+
+
+def save_clicks(events: list) -> None:
+    """
+    Write a batch of queued clicks in one transaction.
+
+    events = [(short_code, user_agent, referer), ...]
+    Runs in threadpool.
+    """
+    # How many clicks each short code got in this batch
+    counts = collections.Counter(short_code for short_code, _, _ in events)
+
+    batch = values(
+        column("code", String), column("n", Integer), name="batch"
+    ).data(list(counts.items()))
+
+    db = SessionLocal()
+    try:
+        # UPDATE urls SET clicks = clicks + batch.n
+        # FROM (VALUES ...) batch WHERE short_code = batch.code
+        # Same active/expiry rules as COUNT_CLICK_SQL, so a
+        # deactivated or expired link stops counting clicks
+        url_ids = dict(db.execute(
+            update(URL)
+            .where(
+                URL.short_code == batch.c.code,
+                URL.is_active,
+                or_(URL.expires_at.is_(None), URL.expires_at > func.now())
+            )
+            .values(clicks=URL.clicks + batch.c.n)
+            .returning(URL.short_code, URL.id)
+        ).all())
+
+        # One multi-row INSERT for all click records
+        # (codes deleted/deactivated/expired since are skipped)
+        rows = [
+            {"url_id": url_ids[short_code], "user_agent": user_agent, "referer": referer}
+            for short_code, user_agent, referer in events
+            if short_code in url_ids
+        ]
+        if rows:
+            db.execute(insert(Click), rows)
+
+        db.commit()
+    finally:
+        db.close()
+
+
+async def write_clicks_forever() -> None:
+    """
+    Drain the click stream into Postgres in batches.
+
+    Events are only acked after they're committed. If a
+    write fails, we go back and re-read our un-acked
+    events ("0") before taking new ones (">"), first
+    claiming any stranded by consumers that are gone.
+    """
+    group_ready = False
+    last_id = None  # None = claim stale events, then "0"
+
+    while True:
+        try:
+            # Inside the try: Redis may be down at startup
+            if not group_ready:
+                await ensure_click_group()
+                group_ready = True
+
+            if last_id is None:
+                claimed = await claim_stale_clicks(
+                    CLICK_CONSUMER, CLICK_CLAIM_IDLE_MS
+                )
+                if claimed:
+                    logger.info("Claimed %d stale click events", claimed)
+                last_id = "0"
+
+            batch = await read_clicks(
+                CLICK_CONSUMER, last_id, CLICK_BATCH_SIZE, CLICK_BLOCK_MS
+            )
+
+            # Nothing left to retry - switch to new events
+            if not batch and last_id == "0":
+                last_id = ">"
+                continue
+
+            events = [
+                (short_code, user_agent, referer)
+                for _, short_code, user_agent, referer in batch
+                if short_code is not None
+            ]
+            if events:
+                await run_in_threadpool(save_clicks, events)
+            if batch:
+                await ack_clicks([event_id for event_id, _, _, _ in batch])
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if isinstance(e, redis.ResponseError) and "NOGROUP" in str(e):
+                # The stream (and its group with it) is gone -
+                # evicted, FLUSHDB, or a restart without
+                # persistence. Recreate the group; id="0" keeps
+                # the clicks XADD has queued since (XADD
+                # recreates the stream, but not the group).
+                logger.warning("Click consumer group missing, recreating it")
+                group_ready = False
+            else:
+                logger.warning("Click writer failed, retrying: %s", e)
+            last_id = None
+            await asyncio.sleep(1)
+
+
+# Fire-and-forget tasks must be referenced somewhere,
+# or asyncio may garbage-collect them mid-flight
+_background_tasks = set()
+
+
+def fire_and_forget(coro) -> None:
+    """Run a coroutine without waiting for it"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background jobs on startup, stop them on shutdown"""
+    # Logged here, not when database.py is imported -
+    # logging isn't configured yet at import time
+    logger.info("Connecting to: %s", engine.url.render_as_string(hide_password=True))
+    await check_memory_policy()
+    gauge_task = asyncio.create_task(refresh_gauges_forever())
+    click_task = asyncio.create_task(write_clicks_forever())
+    yield
+    gauge_task.cancel()
+    click_task.cancel()
+    # Wait for them to actually stop before the app exits
+    # (a batch cut off before its ack stays pending, and
+    # is claimed on the next start)
+    await asyncio.gather(gauge_task, click_task, return_exceptions=True)
+
 # ============================================
 # CREATE APP
 # ============================================
@@ -84,7 +302,11 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/v1/docs",      
     redoc_url="/api/v1/redoc",    
-    openapi_url="/api/v1/openapi.json"
+    openapi_url="/api/v1/openapi.json",
+    # orjson (Rust) serializes JSON several times faster
+    # than the standard json module
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # IMMEDIATELY add CORS (before any @app.get or @app.post!)
@@ -139,12 +361,85 @@ def root():
         "docs": "/api/v1/docs"
     }
 
+# ============================================
+# STATIC ENDPOINTS
+# ============================================
+
+# Browsers and crawlers ask for these constantly.
+# Answer them here, before the /{short_code} catch-all.
+
+@app.get("/favicon.ico", include_in_schema=False)
+def favicon():
+    """No favicon - tell the browser there's nothing to fetch"""
+    return Response(status_code=204)
+
+
+@app.get("/robots.txt", include_in_schema=False)
+def robots():
+    """Allow crawlers (short links are meant to be followed)"""
+    return PlainTextResponse("User-agent: *\nDisallow:\n")
+
 # ============================================
 # REDIRECT ENDPOINT
 # ============================================
 
+# Paths that are never short codes
+# frozenset = built once, O(1) lookups
+RESERVED_WORDS = frozenset({
+    "api", "health", "docs", "redoc", "openapi.json",
+    "shorten", "stats", "cache", "metrics"
+})
+
+# Count a click and fetch the target in ONE round-trip
+# PostgreSQL checks active/expiry itself, and the
+# increment is atomic (no lost updates between clicks).
+# No row back = missing, deactivated or expired.
+COUNT_CLICK_SQL = text("""
+    UPDATE urls
+    SET clicks = clicks + 1
+    WHERE short_code = :code
+      AND is_active
+      AND (expires_at IS NULL OR expires_at > now())
+    RETURNING id, original_url, expires_at
+""")
+
+
+# Plain column SELECT - only what the redirect needs
+# Returns a lightweight Row instead of a full URL object
+# (built once; SQLAlchemy caches the compiled SQL)
+FIND_URL_STMT = select(
+    URL.id, URL.original_url, URL.is_active, URL.expires_at
+).where(URL.short_code == bindparam("code"))
+
+
+def _find_url(db: Session, short_code: str):
+    """Look up a URL row by its short code (runs in threadpool)"""
+    return db.execute(FIND_URL_STMT, {"code": short_code}).first()
+
+
+def _count_click(db: Session, short_code: str, user_agent, referer):
+    """
+    Bump the counter and save a click in one transaction.
+
+    Returns the (id, original_url, expires_at) row, or None if the
+    short code can't be redirected.
+    """
+    row = db.execute(COUNT_CLICK_SQL, {"code": short_code}).first()
+    if row is None:
+        db.rollback()
+        return None
+
+    db.add(Click(
+        url_id=row.id,
+        user_agent=user_agent,
+        referer=referer
+    ))
+    db.commit()
+    return row
+
+
 @app.get("/{short_code}")  # ← Must be @app NOT @api_v1_router
-def redirect_url(
+async def redirect_url(
     short_code: str,
     request: Request,
     db: Session = Depends(get_db)
@@ -153,92 +448,91 @@ def redirect_url(
     """Redirect short URL to original URL"""
 
     # START TIMER
-    import time
     start_time = time.time()
     
-    # Reserved words
-    RESERVED_WORDS = [
-        "api", "health", "docs", "redoc", 
-        "openapi.json", "shorten", "stats", "cache"
-    ]
-    if short_code in RESERVED_WORDS:
+    # Reserved words, or can't possibly be a short code
+    # (wrong length / characters) - reject before any I/O
+    # (not is_valid_short_code: older slugs may be non-ASCII)
+    if short_code in RESERVED_WORDS or not could_be_stored_code(short_code):
         raise HTTPException(status_code=404, detail="Not found")
+
+    user_agent = request.headers.get("user-agent")
+    referer = request.headers.get("referer")
     
     # Check cache first
-    cached_url = get_cached_url(short_code)
+    # Redis is awaited, so the event loop keeps serving
+    # other requests while we wait for the reply.
+    cache_state, cached_url = await get_cached_url(short_code)
+
+    # Known NOT to exist - no need to ask the database
+    if cache_state == CACHE_NEGATIVE:
+        CACHE_GET_NEGATIVE.inc()
+        raise HTTPException(
+            status_code=404,
+            detail=f"Short URL '{short_code}' not found!"
+        )
     
-    if cached_url:
+    if cache_state == CACHE_HIT:
         # TRACK CACHE HIT
-        cache_operations.labels(operation='get', result='hit').inc()
+        CACHE_GET_HIT.inc()
 
-        url_record = db.query(URL).filter(
-            URL.short_code == short_code
-        ).first()
-        
-        if url_record:
-            click = Click(
-                url_id=url_record.id,
-                user_agent=request.headers.get("user-agent"),
-                referer=request.headers.get("referer")
-            )
-            db.add(click)
-            url_record.clicks += 1
-            db.commit()
+        # Queue the click and DON'T wait for it
+        # The user gets their redirect straight away - the
+        # click writer saves it to Postgres in a batch later
+        fire_and_forget(enqueue_click(short_code, user_agent, referer))
 
         # TRACK REDIRECT
-        redirects_total.labels(short_code=short_code).inc()
+        redirects_total.inc()
         
         # RECORD DURATION
         redirect_duration.observe(time.time() - start_time)
         
-        return RedirectResponse(url=cached_url, status_code=307)
+        # Cache returns bytes - decode only here
+        return RedirectResponse(url=cached_url.decode(), status_code=307)
     
     # Cache miss - query database
-    cache_operations.labels(operation='get', result='miss').inc()
+    CACHE_GET_MISS.inc()
 
-    url_record = db.query(URL).filter(
-        URL.short_code == short_code
-    ).first()
-    
-    if not url_record:
+    # The DB session is synchronous - run it in the
+    # threadpool so it doesn't block the event loop
+    row = await run_in_threadpool(
+        _count_click, db, short_code, user_agent, referer
+    )
+
+    if row is None:
+        # Error path only: find out WHY it can't redirect
+        url_record = await run_in_threadpool(_find_url, db, short_code)
+
+        if url_record and not url_record.is_active:
+            raise HTTPException(
+                status_code=410,
+                detail="This URL has been deactivated!"
+            )
+
+        if url_record and is_expired(url_record.expires_at):
+            raise HTTPException(
+                status_code=410,
+                detail="This URL has expired!"
+            )
+
+        # Remember the miss so repeat probes skip the DB
+        await cache_miss(short_code)
         raise HTTPException(
             status_code=404,
             detail=f"Short URL '{short_code}' not found!"
         )
     
-    if not url_record.is_active:
-        raise HTTPException(
-            status_code=410,
-            detail="This URL has been deactivated!"
-        )
-    
-    if is_expired(url_record.expires_at):
-        raise HTTPException(
-            status_code=410,
-            detail="This URL has expired!"
-        )
-    
-    # Cache for next time
-    cache_url(short_code, url_record.original_url)
-    
-    # Record click
-    click = Click(
-        url_id=url_record.id,
-        user_agent=request.headers.get("user-agent"),
-        referer=request.headers.get("referer")
-    )
-    db.add(click)
-    url_record.clicks += 1
-    db.commit()
+    # Cache for next time (never past expires_at)
+    await cache_url(short_code, row.original_url, row.expires_at)
 
     # TRACK REDIRECT
-    redirects_total.labels(short_code=short_code).inc()
+    redirects_total.inc()
     
     # RECORD DURATION
     redirect_duration.observe(time.time() - start_time)
     
     return RedirectResponse(
-        url=url_record.original_url,
+        url=row.original_url,
         status_code=307
     )
 
@@ -250,25 +544,58 @@ def redirect_url(
 # HEALTH CHECK ENDPOINT
 # ============================================
 
-@api_v1_router.get("/health")
-def health_check(db: Session = Depends(get_db)):
-    """
-    Simple health check.
-    Used by Uptime Kuma to monitor our service!
-    """
+# Reuse a health result for this long (seconds)
+# Monitors, liveness and readiness probes can all poll
+# at once - they share one real check per window
+HEALTH_CACHE_SECONDS = float(os.getenv("HEALTH_CACHE_SECONDS", "1"))
+
+# (checked_at, db_status, redis_status) of the last probe
+_last_health = None
+_health_lock = asyncio.Lock()
 
-    # Check database
+
+def _check_database() -> str:
+    """Run a trivial query to check the database (runs in threadpool)"""
+    db = SessionLocal()
     try:
         # Use SQLAlchemy text() for raw SQL
-        from sqlalchemy import text
         db.execute(text("SELECT 1"))
-        db_status = "healthy"
+        return "healthy"
     except Exception as e:
-        db_status = f"unhealthy: {str(e)}"
-        print(f"Database health check failed: {e}")
+        logger.warning("Database health check failed: %s", e)
+        return f"unhealthy: {str(e)}"
+    finally:
+        db.close()
+
+
+async def _probe_dependencies() -> tuple:
+    """
+    Check database + Redis, at most once per HEALTH_CACHE_SECONDS.
+
+    Concurrent callers wait on the lock, then get the
+    result the first caller just produced.
+    """
+    global _last_health
 
-    # Check Redis
-    redis_status = "healthy" if test_connection() else "unhealthy"
+    async with _health_lock:
+        now = time.monotonic()
+        if _last_health is None or now - _last_health[0] >= HEALTH_CACHE_SECONDS:
+            db_status = await run_in_threadpool(_check_database)
+            redis_status = "healthy" if await test_connection() else "unhealthy"
+            _last_health = (now, db_status, redis_status)
+
+    return _last_health[1], _last_health[2]
+
+
+@api_v1_router.get("/health")
+async def health_check():
+    """
+    Simple health check.
+    Used by Uptime Kuma to monitor our service!
+    """
+
+    # Check database + Redis (cached briefly)
+    db_status, redis_status = await _probe_dependencies()
 
     return {
         "status": "healthy" if db_status == "healthy" and redis_status == "healthy" else "degraded",
@@ -283,8 +610,39 @@ def health_check(db: Session = Depends(get_db)):
 # SHORTEN ENDPOINT
 # ============================================
 
+def _insert_url(db: Session, candidates: list, **values):
+    """
+    Insert a URL under the first free candidate code.
+
+    INSERT ... ON CONFLICT (short_code) DO NOTHING
+    Postgres checks uniqueness AND inserts in one
+    round-trip. No row back = code already taken.
+    (No gap between "check" and "insert" either!)
+
+    Returns (short_code, created_at), or (None, None)
+    if every candidate was taken. Runs in threadpool.
+    """
+    for short_code in candidates:
+        stmt = (
+            pg_insert(URL)
+            .values(short_code=short_code, **values)
+            .on_conflict_do_nothing(index_elements=["short_code"])
+            .returning(URL.created_at)
+        )
+        created_at = db.execute(stmt).scalar()
+
+        # Got a row back - it's ours!
+        if created_at is not None:
+            # Commit to database (actually saves!)
+            db.commit()
+            return short_code, created_at
+
+    db.rollback()
+    return None, None
+
+
 @api_v1_router.post("/shorten", response_model=URLResponse)
-def shorten_url(
+async def shorten_url(
     # 'data' comes from request body (JSON)
     # FastAPI automatically validates using URLCreate schema
     data: URLCreate,
@@ -307,54 +665,17 @@ def shorten_url(
     # Pydantic's HttpUrl is an object, we need string
     original_url = str(data.original_url)
 
-    # ── STEP 2: Handle custom slug ─────────
+    # ── STEP 2: Pick candidate short codes ─
     if data.custom_slug:
-        # Check if custom slug already taken
-        existing = db.query(URL).filter(
-            URL.short_code == data.custom_slug
-        ).first()
-
-        # If found, someone already has this slug!
-        if existing:
-            # HTTPException sends error response to client
-            # 400 = Bad Request (client's fault)
-            raise HTTPException(
-                status_code=400,
-                detail=f"Slug '{data.custom_slug}' is already taken!"
-            )
-
-        # Use the custom slug
-        short_code = data.custom_slug
+        # Only one choice - the user's slug
+        candidates = [data.custom_slug]
         is_custom = True
 
     else:
-        # ── STEP 3: Generate unique short code ─
-        # Keep trying until we find one that's not taken
-        max_attempts = 10
-        attempts = 0
-
-        while attempts < max_attempts:
-            # Generate a random code
-            short_code = generate_short_code()
-
-            # Check if it exists in database
-            existing = db.query(URL).filter(
-                URL.short_code == short_code
-            ).first()
-
-            # If not found, we can use it!
-            if not existing:
-                break
-
-            attempts += 1
-
-        # If we couldn't find unique code after 10 tries
-        if attempts == max_attempts:
-            raise HTTPException(
-                status_code=500,
-                detail="Could not generate unique code. Try again!"
-            )
-
+        # ── STEP 3: Generate random candidates ─
+        # Collisions are rare, so we usually only
+        # need the first one - the rest are spares
+        candidates = generate_short_codes(count=10)
         is_custom = False
 
     # ── STEP 4: Calculate expiry ───────────
@@ -364,44 +685,63 @@ def shorten_url(
         expires_at = datetime.now(timezone.utc) + timedelta(hours=data.expires_in_hours)
 
     # ── STEP 5: Save to database ───────────
-    # Create URL object (Python)
-    url_record = URL(
+    # The DB session is synchronous - run it in the
+    # threadpool so it doesn't block the event loop
+    short_code, created_at = await run_in_threadpool(
+        _insert_url,
+        db,
+        candidates,
         original_url=original_url,
-        short_code=short_code,
         is_custom=is_custom,
         expires_at=expires_at,
         clicks=0,
         is_active=True
     )
 
-    # Add to session
-    db.add(url_record)
+    if short_code is None:
+        # Custom slug: someone already has it
+        if is_custom:
+            # HTTPException sends error response to client
+            # 400 = Bad Request (client's fault)
+            raise HTTPException(
+                status_code=400,
+                detail=f"Slug '{data.custom_slug}' is already taken!"
+            )
 
-    # Commit to database (actually saves!)
-    db.commit()
+        # All 10 random candidates were taken
+        raise HTTPException(
+            status_code=500,
+            detail="Could not generate unique code. Try again!"
+        )
 
-    # Refresh to get auto-set values (id, created_at)
-    db.refresh(url_record)
+    # Drop any "doesn't exist" marker left by earlier probes
+    # The URL is already committed - a Redis error here must
+    # not turn it into a 500 (a retry would then get "taken").
+    # Worst case the old marker 404s it for NEGATIVE_TTL.
+    try:
+        await invalidate_url(short_code)
+    except redis.RedisError as e:
+        logger.warning("Could not invalidate cache for %s: %s", short_code, e)
 
     # ── STEP 6: Build response ─────────────
     # Construct the full short URL
     short_url = f"{BASE_URL}/{short_code}"
 
     # -------Metrics scrapping ----------------
-    urls_created_total.labels(is_custom=str(is_custom)).inc()
+    (URLS_CREATED_CUSTOM if is_custom else URLS_CREATED_RANDOM).inc()
     
-    # Update gauge
-    active_count = db.query(URL).filter(URL.is_active).count()
-    active_urls_gauge.set(active_count)
+    # Update gauge - no COUNT(*) here, the periodic
+    # refresh corrects any drift every few seconds
+    active_urls_gauge.inc()
 
     # Return response matching URLResponse schema
     return URLResponse(
-        short_code=url_record.short_code,
+        short_code=short_code,
         short_url=short_url,
-        original_url=url_record.original_url,
-        created_at=url_record.created_at,
-        expires_at=url_record.expires_at,
-        clicks=url_record.clicks
+        original_url=original_url,
+        created_at=created_at,
+        expires_at=expires_at,
+        clicks=0
     )
 
 
@@ -409,6 +749,13 @@ def shorten_url(
 # STATS ENDPOINT
 # ============================================
 
+# Only the columns StatsResponse needs
+STATS_STMT = select(
+    URL.short_code, URL.original_url, URL.clicks,
+    URL.created_at, URL.expires_at, URL.is_active
+).where(URL.short_code == bindparam("code"))
+
+
 @api_v1_router.get("/stats/{short_code}", response_model=StatsResponse)
 def get_stats(
     short_code: str,
@@ -421,9 +768,7 @@ def get_stats(
     """
 
     # Find URL
-    url_record = db.query(URL).filter(
-        URL.short_code == short_code
-    ).first()
+    url_record = db.execute(STATS_STMT, {"code": short_code}).first()
 
     # Not found?
     if not url_record:
@@ -442,12 +787,12 @@ def get_stats(
     )
 
 @api_v1_router.get("/cache/stats")
-def cache_statistics():
+async def cache_statistics():
     """
     View Redis cache statistics.
     Shows hits, misses, memory usage.
     """
-    return get_cache_stats()
+    return await get_cache_stats()
 
 # ============================================
 # MOUNT THE API v1 ROUTER
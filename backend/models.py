@@ -41,8 +41,13 @@ class URL(Base):
 
     # The short code (e.g., "abc123")
     # unique=True = no two URLs can have same code
-    # index=True = fast lookups (we search by this!)
-    short_code = Column(String(10), unique=True, index=True, nullable=False)
+    # Its unique index also serves every lookup by code,
+    # and is what INSERT ... ON CONFLICT (short_code) uses.
+    # (Older databases also have ix_urls_short_code, an exact
+    #  duplicate of that index - drop it once:
+    #    DROP INDEX IF EXISTS ix_urls_short_code;
+    #    DROP INDEX IF EXISTS ix_urls_active_code; )
+    short_code = Column(String(10), unique=True, nullable=False)
 
     # Was a custom slug chosen by user?
     # Boolean = True or False
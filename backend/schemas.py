@@ -5,6 +5,8 @@ from pydantic import BaseModel, HttpUrl, field_validator
 from datetime import datetime
 from typing import Optional
 
+from helpers import is_valid_short_code
+
 # ============================================
 # INPUT SCHEMAS (what client sends to us)
 # ============================================
@@ -32,6 +34,13 @@ class URLCreate(BaseModel):
         if slug is None:
             return slug
 
+        # Fast path: one compiled regex match covers
+        # length AND characters for every valid slug
+        if is_valid_short_code(slug):
+            # Convert to lowercase
+            return slug.lower()
+
+        # Invalid - work out which rule failed for the message
         # Slug must be at least 3 characters
         if len(slug) < 3:
             raise ValueError('Slug must be at least 3 characters')
@@ -41,11 +50,7 @@ class URLCreate(BaseModel):
             raise ValueError('Slug must be max 10 characters')
 
         # Slug can only contain letters and numbers
-        if not slug.isalnum():
-            raise ValueError('Slug can only contain letters and numbers')
-
-        # Convert to lowercase
-        return slug.lower()
+        raise ValueError('Slug can only contain letters and numbers')
 
 
 # ============================================
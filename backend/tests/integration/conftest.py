@@ -1,25 +1,60 @@
 """Pytest configuration for integration tests"""
 
-import pytest
-import time
+import asyncio
 
+import httpx
+import pytest_asyncio
 
-@pytest.fixture(scope="session", autouse=True)
-def wait_for_api():
+BASE_URL = "http://localhost:8000"
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def client():
+    """
+    One async HTTP client shared by every test.
+
+    Keep-alive reuses the same TCP connections for the
+    whole suite, and independent requests can be sent
+    concurrently with asyncio.gather.
+
+    Redirects are never followed, so tests see the 307
+    itself (set once here instead of on every request).
+    """
+    limits = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+    async with httpx.AsyncClient(
+        base_url=BASE_URL, limits=limits, follow_redirects=False
+    ) as c:
+        yield c
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session", autouse=True)
+async def wait_for_api(client):
     """Wait for API to be ready before running tests"""
-    import requests
     max_retries = 30
     
     for i in range(max_retries):
         try:
-            response = requests.get("http://localhost:8000/api/v1/health", timeout=2)
+            response = await client.get("/api/v1/health", timeout=2)
             if response.status_code == 200:
                 print("\nAPI is ready!")
                 return
         except Exception:
             if i < max_retries - 1:
-                time.sleep(1)
+                await asyncio.sleep(1)
             else:
                 raise Exception("API failed to start in time")
     
-    raise Exception("API not responding")
\ No newline at end of file
+    raise Exception("API not responding")
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session", autouse=True)
+async def warm_up(client, wait_for_api):
+    """
+    Open keep-alive connections before the first test.
+
+    A few concurrent requests leave several connections in
+    the pool and get the API's DB pool and Redis client
+    connected, so no single test pays that cost.
+    """
+    paths = ["/api/v1/health", "/api/v1/cache/stats"] * 2
+    await asyncio.gather(*(client.get(path) for path in paths))
@@ -1,26 +1,88 @@
 """Integration tests for URL Shortener API"""
 
-import requests
-import time
-import random
-import string
+import asyncio
+import uuid
 
-BASE_URL = "http://localhost:8000"
+import orjson
+import pytest
+import pytest_asyncio
+
+# Paths are relative - the shared client already has the
+# base URL, so nothing is rebuilt per request
+SHORTEN = "/api/v1/shorten"
+STATS = "/api/v1/stats/"
+HEALTH = "/api/v1/health"
+CACHE_STATS = "/api/v1/cache/stats"
+METRICS = "/metrics"
+
+# Every test shares the session's event loop (and client)
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+SMOKE_PATHS = (HEALTH, CACHE_STATS, METRICS)
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="session")
+async def smoke(client):
+    """
+    Fetch the read-only monitoring endpoints all at once.
+
+    They don't depend on each other, so one concurrent
+    round replaces three serial requests. Returns
+    {path: response}.
+    """
+    responses = await asyncio.gather(*(client.get(path) for path in SMOKE_PATHS))
+    return dict(zip(SMOKE_PATHS, responses))
 
 
 def random_slug():
-    """Generate random slug without hyphens"""
-    return ''.join(random.choices(string.ascii_lowercase + string.digits, k=8))
+    """Generate unique slug without hyphens (10 hex chars)"""
+    return uuid.uuid4().hex[:10]
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="session")
+async def shared_slug(client):
+    """
+    One short URL (to https://example.com) for read-only tests.
+
+    Tests that only redirect or read stats don't need their
+    own URL, so it's created once per module. Tests that
+    check click counts still make a fresh slug.
+    """
+    slug = random_slug()
+    payload = {"original_url": "https://example.com", "custom_slug": slug}
+    response = await client.post(SHORTEN, json=payload)
+    assert response.status_code == 200
+    return slug
+
+
+async def wait_for_clicks(client, slug, expected, timeout=2.0):
+    """
+    Poll stats until total_clicks reaches `expected`.
+
+    Clicks on cached redirects are saved in batches after
+    the 307 is sent. Backs off 10ms, 20ms, 40ms... and
+    returns as soon as the count is there.
+    """
+    delay, waited = 0.01, 0.0
+    while True:
+        response = await client.get(STATS + slug)
+        assert response.status_code == 200
+        clicks = orjson.loads(response.content)["total_clicks"]
+        if clicks >= expected or waited >= timeout:
+            return clicks
+        await asyncio.sleep(delay)
+        waited += delay
+        delay *= 2
 
 
 class TestHealthEndpoint:
     """Test health check endpoint"""
     
-    def test_health_check(self):
+    async def test_health_check(self, smoke):
         """Health endpoint returns healthy status"""
-        response = requests.get(f"{BASE_URL}/api/v1/health")
+        response = smoke[HEALTH]
         assert response.status_code == 200
-        data = response.json()
+        data = orjson.loads(response.content)
         assert data["status"] == "healthy"
         assert "dependencies" in data
         assert data["dependencies"]["database"] == "healthy"
@@ -30,171 +92,175 @@ class TestHealthEndpoint:
 class TestURLShortening:
     """Test URL shortening functionality"""
     
-    def test_shorten_random_url(self):
+    async def test_shorten_random_url(self, client):
         """Create URL with random short code"""
         payload = {"original_url": "https://example.com"}
-        response = requests.post(f"{BASE_URL}/api/v1/shorten", json=payload)
+        response = await client.post(SHORTEN, json=payload)
         
         assert response.status_code == 200
-        data = response.json()
+        data = orjson.loads(response.content)
         assert "short_code" in data
         assert data["original_url"] == "https://example.com/"
         assert "short_url" in data
         assert data["clicks"] == 0
     
-    def test_shorten_custom_slug(self):
+    async def test_shorten_custom_slug(self, client):
         """Create URL with custom slug (no hyphens)"""
         slug = random_slug()
         payload = {
             "original_url": "https://github.com",
             "custom_slug": slug
         }
-        response = requests.post(f"{BASE_URL}/api/v1/shorten", json=payload)
+        response = await client.post(SHORTEN, json=payload)
         
         assert response.status_code == 200
-        data = response.json()
+        data = orjson.loads(response.content)
         assert data["short_code"] == slug
         assert data["original_url"] == "https://github.com/"
     
-    def test_duplicate_custom_slug(self):
+    async def test_duplicate_custom_slug(self, client):
         """Duplicate custom slug returns error"""
         slug = random_slug()
         payload = {"original_url": "https://example.com", "custom_slug": slug}
         
-        # First request succeeds
-        response1 = requests.post(f"{BASE_URL}/api/v1/shorten", json=payload)
-        assert response1.status_code == 200
-        
-        # Second request with same slug fails
-        response2 = requests.post(f"{BASE_URL}/api/v1/shorten", json=payload)
-        assert response2.status_code == 400
+        # Send both at once - exactly one may win the slug,
+        # even when they race (no 500s, no double insert)
+        response1, response2 = await asyncio.gather(
+            client.post(SHORTEN, json=payload),
+            client.post(SHORTEN, json=payload),
+        )
+        codes = sorted([response1.status_code, response2.status_code])
+        assert codes == [200, 400]
     
-    def test_invalid_url(self):
+    async def test_invalid_url(self, client):
         """Invalid URL returns error"""
         payload = {"original_url": "not-a-valid-url"}
-        response = requests.post(f"{BASE_URL}/api/v1/shorten", json=payload)
+        response = await client.post(SHORTEN, json=payload)
         assert response.status_code == 422
 
 
 class TestRedirect:
     """Test URL redirect functionality"""
     
-    def test_redirect_works(self):
+    async def test_redirect_works(self, client, shared_slug):
         """Short URL redirects to original"""
-        # Create URL first
-        slug = random_slug()
-        payload = {
-            "original_url": "https://example.com",
-            "custom_slug": slug
-        }
-        create_response = requests.post(f"{BASE_URL}/api/v1/shorten", json=payload)
-        assert create_response.status_code == 200
-        
-        # Test redirect
-        response = requests.get(
-            f"{BASE_URL}/{slug}",
-            allow_redirects=False
-        )
+        response = await client.get("/" + shared_slug)
         assert response.status_code == 307
         assert "location" in response.headers
         assert response.headers["location"] == "https://example.com/"
     
-    def test_redirect_increments_clicks(self):
+    async def test_redirect_increments_clicks(self, client):
         """Redirect increments click count"""
         # Create URL
         slug = random_slug()
         payload = {"original_url": "https://example.com", "custom_slug": slug}
-        requests.post(f"{BASE_URL}/api/v1/shorten", json=payload)
-        
-        # Get initial clicks
-        stats1 = requests.get(f"{BASE_URL}/api/v1/stats/{slug}")
-        assert stats1.status_code == 200
-        initial_clicks = stats1.json()["total_clicks"]
+        create_response = await client.post(SHORTEN, json=payload)
+        assert create_response.status_code == 200
         
         # Click the URL
-        requests.get(f"{BASE_URL}/{slug}", allow_redirects=False)
+        await client.get("/" + slug)
         
-        # Check clicks increased
-        stats2 = requests.get(f"{BASE_URL}/api/v1/stats/{slug}")
-        assert stats2.status_code == 200
-        new_clicks = stats2.json()["total_clicks"]
-        assert new_clicks == initial_clicks + 1
+        # A new URL starts at 0, so one click = 1
+        assert await wait_for_clicks(client, slug, 1) == 1
     
-    def test_nonexistent_code_404(self):
+    async def test_nonexistent_code_404(self, client):
         """Non-existent short code returns 404"""
-        response = requests.get(f"{BASE_URL}/nonexistent123abc")
+        # Valid shape, so this goes through cache + database
+        # (test_invalid_code_shape_404 covers the early reject)
+        response = await client.get("/" + random_slug())
+        assert response.status_code == 404
+
+    async def test_invalid_code_shape_404(self, client):
+        """Paths that can't be short codes return 404"""
+        response = await client.get("/not-a-code.php")
         assert response.status_code == 404
 
+    async def test_favicon_no_content(self, client):
+        """Favicon requests don't reach the redirect handler"""
+        response = await client.get("/favicon.ico")
+        assert response.status_code == 204
+
+    async def test_slug_created_after_404_redirects(self, client):
+        """A slug probed before it existed works once created"""
+        slug = random_slug()
+
+        # First probe is a 404 (and gets remembered)
+        response = await client.get("/" + slug)
+        assert response.status_code == 404
+
+        payload = {"original_url": "https://example.com", "custom_slug": slug}
+        create_response = await client.post(SHORTEN, json=payload)
+        assert create_response.status_code == 200
+
+        response = await client.get("/" + slug)
+        assert response.status_code == 307
+
 
 class TestStats:
     """Test statistics endpoint"""
     
-    def test_stats_endpoint(self):
+    async def test_stats_endpoint(self, client, shared_slug):
         """Stats endpoint returns correct data"""
-        # Create URL first
-        slug = random_slug()
-        payload = {
-            "original_url": "https://example.com",
-            "custom_slug": slug
-        }
-        create_response = requests.post(f"{BASE_URL}/api/v1/shorten", json=payload)
-        assert create_response.status_code == 200
-        
-        # Get stats
-        response = requests.get(f"{BASE_URL}/api/v1/stats/{slug}")
+        response = await client.get(STATS + shared_slug)
         assert response.status_code == 200
         
-        data = response.json()
-        assert data["short_code"] == slug
+        data = orjson.loads(response.content)
+        assert data["short_code"] == shared_slug
         assert data["original_url"] == "https://example.com/"
         assert data["total_clicks"] >= 0
         assert data["is_active"] is True
     
-    def test_stats_nonexistent(self):
+    async def test_stats_nonexistent(self, client):
         """Stats for non-existent URL returns 404"""
-        response = requests.get(f"{BASE_URL}/api/v1/stats/nonexistent999")
+        response = await client.get(STATS + "nonexistent999")
         assert response.status_code == 404
 
 
 class TestCache:
     """Test Redis caching functionality"""
     
-    def test_cache_stats_endpoint(self):
+    async def test_cache_stats_endpoint(self, smoke):
         """Cache stats endpoint works"""
-        response = requests.get(f"{BASE_URL}/api/v1/cache/stats")
+        response = smoke[CACHE_STATS]
         assert response.status_code == 200
         
-        data = response.json()
+        data = orjson.loads(response.content)
         assert "total_keys" in data
         assert "hits" in data
         assert "misses" in data
     
-    def test_redirect_uses_cache(self):
+    async def test_redirect_uses_cache(self, client):
         """Multiple redirects increase cache hits"""
         # Create URL
         slug = random_slug()
         payload = {"original_url": "https://example.com", "custom_slug": slug}
-        requests.post(f"{BASE_URL}/api/v1/shorten", json=payload)
+        await client.post(SHORTEN, json=payload)
         
-        # Do multiple redirects
-        for _ in range(3):
-            requests.get(f"{BASE_URL}/{slug}", allow_redirects=False)
-            time.sleep(0.1)
+        # Do multiple redirects - all at once
+        # Each response is itself the signal the server is done
+        responses = await asyncio.gather(*(
+            client.get("/" + slug)
+            for _ in range(3)
+        ))
+        assert all(r.status_code == 307 for r in responses)
+
+        # Every redirect was counted (cached ones in a batch)
+        assert await wait_for_clicks(client, slug, 3) == 3
         
         # Just verify endpoint works - cache behavior varies
-        stats = requests.get(f"{BASE_URL}/api/v1/cache/stats")
+        stats = await client.get(CACHE_STATS)
         assert stats.status_code == 200
         # Cache stats should have some activity
-        data = stats.json()
+        data = orjson.loads(stats.content)
         assert isinstance(data.get("total_keys"), int)
 
 
 class TestMetrics:
     """Test Prometheus metrics endpoint"""
     
-    def test_metrics_endpoint(self):
+    async def test_metrics_endpoint(self, smoke):
         """Metrics endpoint returns Prometheus format"""
-        response = requests.get(f"{BASE_URL}/metrics")
+        response = smoke[METRICS]
         assert response.status_code == 200
         assert "urlshortener" in response.text
         assert "http_requests_total" in response.text
\ No newline at end of file